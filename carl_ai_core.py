@@ -2,55 +2,204 @@
 CARL - Cognitive Archive & Relational Legacy
 AI/ML Agent - Core Kognitív Motor
 Verzió: 0.1.0-beta
+
+A modul teljesen típusannotált, így natív C kiterjesztéssé fordítható:
+    mypyc carl_ai_core.py
 """
 
 import asyncio
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
-from enum import Enum
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import IntEnum
 import hashlib
 import json
+import logging
+import re
+import sys
+import threading
+import time
 from datetime import datetime
 
+logger = logging.getLogger("carl")
+
+try:
+    import hyperscan  # type: ignore[import-not-found]  # Opcionális: vektorizált többmintás keresés (DFA)
+except ImportError:
+    hyperscan = None  # type: ignore[assignment]
+
+try:
+    import orjson  # Opcionális: C/Rust JSON szerializáló, natív datetime támogatással
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 # Szimulált importok (production-ben ezek valós library-k lennének)
 # from transformers import pipeline
 # import torch
 # import cv2
 # from deepface import DeepFace
+# import faiss
+
+# Elemzési cache kapacitás (duplikált / újramegosztott média)
+ANALYSIS_CACHE_SIZE = 10_000
+
+# Audio deepfake osztályozó döntési küszöb (sigmoid kimenet)
+AUDIO_SYNTHETIC_THRESHOLD = 0.5
+
+# Hash blokkméret: 1 MiB szeletek, hogy a hash állapot és az input cache-ben maradjon
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+# Média forrás: teljes blob, fájlszerű objektum vagy chunk iterátor
+BytesLike = Union[bytes, bytearray, memoryview]
+MediaSource = Union[BytesLike, BinaryIO, Iterable[bytes]]
+
+_BYTES_LIKE = (bytes, bytearray, memoryview)
+
+
+def _sha256_digest(source: MediaSource) -> bytes:
+    """
+    SHA-256 nagy bináris blobokra vagy streamekre
+    Az OpenSSL backend (SHA-NI ahol elérhető) 1 MiB-os szeleteken fut,
+    így a memóriaigény O(1 MiB) a fájlmérettől függetlenül
+    Nyers 32 byte-os digestet ad vissza, hex kódolás csak kiíráskor
+    """
+    h = hashlib.sha256()
+    if isinstance(source, _BYTES_LIKE):
+        view = memoryview(source)
+        for offset in range(0, len(view), _HASH_CHUNK_SIZE):
+            h.update(view[offset:offset + _HASH_CHUNK_SIZE])
+    elif hasattr(source, "read"):
+        for chunk in iter(lambda: source.read(_HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    else:
+        for chunk in source:
+            h.update(chunk)
+    return h.digest()
+
+
+def _json_default(value: Any) -> str:
+    """stdlib json fallback: datetime -> ISO 8601"""
+    return value.isoformat()
+
+
+def report_to_json(report: Dict) -> str:
+    """
+    Riport JSON szerializálása (audit / export)
+    orjson ha elérhető, különben stdlib json; a datetime mezők ISO formátumot kapnak
+    """
+    if orjson is not None:
+        return orjson.dumps(report, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(
+        report,
+        indent=2,
+        ensure_ascii=False,
+        default=_json_default
+    )
+
 
+def _content_key(data: BytesLike) -> bytes:
+    """Gyors 16 byte-os tartalom kulcs cache-hez (BLAKE2b)"""
+    return hashlib.blake2b(data, digest_size=16).digest()
 
-class ContentType(Enum):
-    """Tartalom típusok CARL számára"""
-    TEXT = "text"
-    IMAGE = "image"
-    VIDEO = "video"
-    AUDIO = "audio"
-    MIXED = "mixed"
 
+class _BoundedCache:
+    """
+    Méretkorlátos LRU cache
+    Telítettségnél a legrégebben használt elem esik ki; szálbiztos, mert az
+    async API worker szálakon futtatja a motort
+    """
+    
+    def __init__(self, capacity: int = ANALYSIS_CACHE_SIZE):
+        self.capacity = capacity
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# Rejtett reklám gyanús minták (GVH)
+SUSPICIOUS_PATTERNS = (
+    "linkbio", "swipe up", "kód:", "kedvezmény",
+    "együttműködés", "szponzor nélkül"
+)
+
+
+def _build_hyperscan_db() -> Any:
+    """
+    Minták egyszeri lefordítása Hyperscan adatbázissá
+    Egyetlen memóriabejárás posztonként, N külön keresés helyett
+    """
+    flags = (
+        hyperscan.HS_FLAG_CASELESS
+        | hyperscan.HS_FLAG_UTF8
+        | hyperscan.HS_FLAG_UCP
+        | hyperscan.HS_FLAG_SINGLEMATCH
+    )
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[re.escape(p).encode() for p in SUSPICIOUS_PATTERNS],
+        ids=list(range(len(SUSPICIOUS_PATTERNS))),
+        flags=[flags] * len(SUSPICIOUS_PATTERNS)
+    )
+    return db
 
-class ThreatLevel(Enum):
-    """Veszélyességi szintek"""
-    SAFE = "safe"
-    SUSPICIOUS = "suspicious"
-    HARMFUL = "harmful"
-    ILLEGAL = "illegal"
 
+_HS_DB = _build_hyperscan_db() if hyperscan is not None else None
 
-@dataclass
+# Tiszta Python útvonal: egyetlen C szintű regex keresés, .lower() másolat nélkül
+_SUSPICIOUS_RE = re.compile(
+    "|".join(map(re.escape, SUSPICIOUS_PATTERNS)),
+    re.IGNORECASE
+)
+
+
+class ContentType(IntEnum):
+    """Tartalom típusok CARL számára (olvasható név: .name)"""
+    TEXT = 0
+    IMAGE = 1
+    VIDEO = 2
+    AUDIO = 3
+    MIXED = 4
+
+
+class ThreatLevel(IntEnum):
+    """Veszélyességi szintek, növekvő súlyosság szerint rendezve"""
+    SAFE = 0
+    SUSPICIOUS = 1
+    HARMFUL = 2
+    ILLEGAL = 3
+
+
+@dataclass(slots=True)
 class UserProfile:
     """Felhasználói profil Carl számára"""
     user_id: str
-    voice_signature: Optional[str] = None  # Hash, nem raw adat
-    face_template: Optional[str] = None    # Hash, nem raw adat
-    content_rights: Dict = None
+    voice_signature: Optional[bytes] = None  # Nyers 32 byte-os hash, nem raw adat
+    face_template: Optional[bytes] = None    # Nyers 32 byte-os hash, nem raw adat
+    content_rights: Dict[str, bool] = field(
+        default_factory=lambda: {"voice": False, "face": False}
+    )
     consent_given: bool = False
-    
-    def __post_init__(self):
-        if self.content_rights is None:
-            self.content_rights = {"voice": False, "face": False}
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisResult:
     """Carl elemzés eredménye"""
     content_id: str
@@ -59,8 +208,13 @@ class AnalysisResult:
     confidence: float
     threat_level: ThreatLevel
     flags: List[str]
-    timestamp: datetime
-    details: Dict
+    timestamp_ns: int  # time.time_ns(), datetime csak kiíráskor
+    details: Dict[str, Any]
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Elemzés időpontja (visszafelé kompatibilis datetime nézet)"""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
 
 
 class CARLCognitiveEngine:
@@ -69,46 +223,73 @@ class CARLCognitiveEngine:
     Felelős: NLP, deepfake detekció, tartalom monitoring
     """
     
-    def __init__(self):
+    def __init__(self) -> None:
         self.version = "0.1.0-beta"
         self.models_loaded = False
-        self.user_registry = {}
+        self.user_registry: Dict[str, UserProfile] = {}
+        # Rejtett reklám keresés: Hyperscan ha elérhető, különben regex
+        self.use_hyperscan = _HS_DB is not None
+        
+        # Tartalom-hash alapú cache-ek: duplikált média nem fut újra
+        self._voice_cache = _BoundedCache()
+        self._face_cache = _BoundedCache()
+        self._audio_deepfake_cache = _BoundedCache()
+        self._video_deepfake_cache = _BoundedCache()
+        
+        # Tartalom típus -> kötegelt deepfake detektor
+        self._deepfake_dispatch: Dict[
+            ContentType, Callable[[List[bytes]], List[Tuple[bool, float]]]
+        ] = {
+            ContentType.AUDIO: self.detect_deepfake_audio_batch,
+            ContentType.VIDEO: self.detect_deepfake_video_batch,
+        }
         
         # AI modellek inicializálása (szimulált)
         self._init_models()
     
-    def _init_models(self):
+    def _init_models(self) -> None:
         """AI modellek betöltése"""
-        print("[CARL] 🤖 Kognitív modellek inicializálása...")
+        logger.info("🤖 Kognitív modellek inicializálása...")
         
         # Production esetén:
         # self.nlp_model = pipeline("text-classification", model="SZTAKI-HLT/hubert-base-cc")
         # self.voice_model = torch.load("models/voice_fingerprint.pth")
         # self.face_model = DeepFace.build_model("Facenet")
         # self.deepfake_detector = torch.load("models/deepfake_detector.pth")
+        # IVF-PQ index: szublineáris arc keresés, 64 byte / 512 dim. (ArcFace) embedding
+        # self.face_index = faiss.IndexIDMap(faiss.IndexIVFPQ(
+        #     faiss.IndexFlatL2(512), 512, 1024, 64, 8
+        # ))
+        # self.audio_deepfake_session = onnxruntime.InferenceSession(
+        #     "models/audio_deepfake_int8.onnx",
+        #     providers=["CUDAExecutionProvider", "CPUExecutionProvider"]
+        # )
         
         self.models_loaded = True
-        print("[CARL] ✅ Modellek betöltve")
+        logger.info("✅ Modellek betöltve")
     
     # ═══════════════════════════════════════════════════════════
     # BIOMETRIKUS AZONOSÍTÁS ÉS VÉDELEM
     # ═══════════════════════════════════════════════════════════
     
-    async def register_user_biometrics(
+    def register_user_biometrics(
         self, 
         user_id: str, 
-        voice_sample: bytes = None,
-        face_image: bytes = None,
+        voice_sample: Optional[MediaSource] = None,
+        face_image: Optional[MediaSource] = None,
         consent: bool = False
     ) -> UserProfile:
         """
         Felhasználó biometrikus adatainak regisztrálása
         FONTOS: Csak hash-t tárolunk, nem raw adatot (GDPR)
+        A minták átadhatók fájlszerű objektumként is (streamelt hash)
         """
         
         if not consent:
             raise ValueError("GDPR: Felhasználói hozzájárulás szükséges!")
         
+        # Internált azonosító: a későbbi registry lookup-ok pointer összehasonlítással rövidülnek
+        user_id = sys.intern(user_id)
         profile = UserProfile(user_id=user_id, consent_given=consent)
         
         if voice_sample:
@@ -116,39 +297,67 @@ class CARLCognitiveEngine:
             voice_hash = self._generate_voice_fingerprint(voice_sample)
             profile.voice_signature = voice_hash
             profile.content_rights["voice"] = True
-            print(f"[CARL] 🎤 Hang ujjlenyomat regisztrálva: {user_id}")
+            logger.info("🎤 Hang ujjlenyomat regisztrálva: %s", user_id)
         
         if face_image:
             # Arc template generálás (csak hash)
             face_hash = self._generate_face_template(face_image)
             profile.face_template = face_hash
             profile.content_rights["face"] = True
-            print(f"[CARL] 👤 Arc template regisztrálva: {user_id}")
+            logger.info("👤 Arc template regisztrálva: %s", user_id)
         
         self.user_registry[user_id] = profile
+        # A tárolt hang megváltozhatott: a korábbi deepfake eredmények érvénytelenek
+        self._audio_deepfake_cache.clear()
         return profile
     
-    def _generate_voice_fingerprint(self, audio_data: bytes) -> str:
+    def _generate_voice_fingerprint(
+        self,
+        audio_data: MediaSource,
+        content_key: Optional[bytes] = None
+    ) -> bytes:
         """
         Hang ujjlenyomat generálása
         Production: MFCC + neural embedding
+        content_key: a hívó által már kiszámolt _content_key, hogy ne hasheljünk kétszer
         """
-        # Szimulált: valójában komplex audio processing
-        return hashlib.sha256(audio_data).hexdigest()
-    
-    def _generate_face_template(self, image_data: bytes) -> str:
+        if not isinstance(audio_data, _BYTES_LIKE):
+            # Stream: nincs teljes blob, amiből cache kulcs képezhető
+            return _sha256_digest(audio_data)
+        
+        key = content_key if content_key is not None else _content_key(audio_data)
+        fingerprint = self._voice_cache.get(key)
+        if fingerprint is None:
+            # Szimulált: valójában komplex audio processing
+            fingerprint = _sha256_digest(audio_data)
+            self._voice_cache.put(key, fingerprint)
+        return fingerprint
+    
+    def _generate_face_template(
+        self,
+        image_data: MediaSource,
+        content_key: Optional[bytes] = None
+    ) -> bytes:
         """
         Arc template generálása
         Production: FaceNet/ArcFace embedding
         """
-        # Szimulált: valójában deep learning model
-        return hashlib.sha256(image_data).hexdigest()
+        if not isinstance(image_data, _BYTES_LIKE):
+            return _sha256_digest(image_data)
+        
+        key = content_key if content_key is not None else _content_key(image_data)
+        template = self._face_cache.get(key)
+        if template is None:
+            # Szimulált: valójában deep learning model
+            template = _sha256_digest(image_data)
+            self._face_cache.put(key, template)
+        return template
     
     # ═══════════════════════════════════════════════════════════
     # DEEPFAKE DETEKCIÓ
     # ═══════════════════════════════════════════════════════════
     
-    async def detect_deepfake_audio(
+    def detect_deepfake_audio(
         self, 
         audio_data: bytes,
         claimed_user_id: Optional[str] = None
@@ -157,8 +366,19 @@ class CARLCognitiveEngine:
         Hang deepfake detekció
         Visszaadja: (is_fake, confidence_score)
         """
+        return self.detect_deepfake_audio_batch([audio_data], [claimed_user_id])[0]
+    
+    def detect_deepfake_audio_batch(
+        self,
+        audio_samples: List[bytes],
+        claimed_user_ids: Optional[List[Optional[str]]] = None
+    ) -> List[Tuple[bool, float]]:
+        """
+        Hang deepfake detekció kötegben
+        Visszaadja: [(is_fake, confidence_score), ...] a bemenet sorrendjében
+        """
         
-        print("[CARL] 🔍 Audio deepfake analízis...")
+        logger.debug("🔍 Audio deepfake analízis (%d minta)...", len(audio_samples))
         
         # Production esetén:
         # - Spektrogram analízis
@@ -166,22 +386,65 @@ class CARLCognitiveEngine:
         # - Temporal inconsistency check
         # - Voice fingerprint matching
         
-        # Szimulált eredmény
-        is_synthetic = False
-        confidence = 0.95
+        if claimed_user_ids is None:
+            claimed_user_ids = [None] * len(audio_samples)
         
-        if claimed_user_id and claimed_user_id in self.user_registry:
-            # Ellenőrzés regisztrált hanggal
-            stored_print = self.user_registry[claimed_user_id].voice_signature
-            current_print = self._generate_voice_fingerprint(audio_data)
+        results: List[Tuple[bool, float]] = [(False, 0.0)] * len(audio_samples)
+        cache_keys = [
+            (_content_key(audio_data), claimed_user_id)
+            for audio_data, claimed_user_id in zip(audio_samples, claimed_user_ids)
+        ]
+        misses = []
+        for i, cache_key in enumerate(cache_keys):
+            cached = self._audio_deepfake_cache.get(cache_key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.append(i)
+        
+        # A cache-ben nem szereplő minták egyetlen modell forwardban
+        scores = self._score_audio_batch([audio_samples[i] for i in misses])
+        
+        for i, score in zip(misses, scores):
+            is_synthetic = score >= AUDIO_SYNTHETIC_THRESHOLD
+            confidence = 0.95  # Szimulált
+            
+            claimed_user_id = claimed_user_ids[i]
+            if claimed_user_id and claimed_user_id in self.user_registry:
+                # Ellenőrzés regisztrált hanggal
+                stored_print = self.user_registry[claimed_user_id].voice_signature
+                current_print = self._generate_voice_fingerprint(
+                    audio_samples[i], content_key=cache_keys[i][0]
+                )
+                
+                if stored_print != current_print:
+                    is_synthetic = True
+                    confidence = 0.88
             
-            if stored_print != current_print:
-                is_synthetic = True
-                confidence = 0.88
+            self._audio_deepfake_cache.put(cache_keys[i], (is_synthetic, confidence))
+            results[i] = (is_synthetic, confidence)
+        
+        return results
+    
+    def _score_audio_batch(self, audio_samples: List[bytes]) -> List[float]:
+        """
+        Szintetikus hang valószínűség a teljes kötegre, egyetlen modell forwarddal
+        
+        Production esetén:
+        - minták közös hosszra paddelve, (B, T) tenzorba stackelve
+        - Mel spektrogram on-device (torchaudio.transforms.MelSpectrogram)
+        - STFT osztályozó CUDA-n FP16 autocast alatt, sigmoid kimenet
+        - CPU deploy: INT8 kvantált ONNX modell (onnxruntime, CPUExecutionProvider)
+        """
+        if not audio_samples:
+            return []
         
-        return is_synthetic, confidence
+        # self.audio_deepfake_session.run(None, {"mel": mel_batch})[0][:, 0]
+        
+        # Szimulált: egyik minta sem szintetikus
+        return [0.0] * len(audio_samples)
     
-    async def detect_deepfake_video(
+    def detect_deepfake_video(
         self,
         video_data: bytes,
         claimed_user_id: Optional[str] = None
@@ -189,8 +452,18 @@ class CARLCognitiveEngine:
         """
         Video deepfake detekció
         """
+        return self.detect_deepfake_video_batch([video_data])[0]
+    
+    def detect_deepfake_video_batch(
+        self,
+        videos: List[bytes]
+    ) -> List[Tuple[bool, float]]:
+        """
+        Video deepfake detekció kötegben
+        Production: a frame tenzorok egy batch-be stackelve, egyetlen GPU forward
+        """
         
-        print("[CARL] 🔍 Video deepfake analízis...")
+        logger.debug("🔍 Video deepfake analízis (%d minta)...", len(videos))
         
         # Production esetén:
         # - Frame-by-frame face detection
@@ -199,17 +472,23 @@ class CARLCognitiveEngine:
         # - Eye blinking analysis
         # - Lighting consistency
         
-        # Szimulált
-        is_synthetic = False
-        confidence = 0.92
+        results = []
+        for video_data in videos:
+            key = _content_key(video_data)
+            cached = self._video_deepfake_cache.get(key)
+            if cached is None:
+                # Szimulált
+                cached = (False, 0.92)
+                self._video_deepfake_cache.put(key, cached)
+            results.append(cached)
         
-        return is_synthetic, confidence
+        return results
     
     # ═══════════════════════════════════════════════════════════
     # KÖZÖSSÉGI MÉDIA MONITORING
     # ═══════════════════════════════════════════════════════════
     
-    async def analyze_social_content(
+    def analyze_social_content(
         self,
         content: str,
         content_type: ContentType,
@@ -222,71 +501,126 @@ class CARLCognitiveEngine:
         - Deepfake jelölés
         - Szerzői jogi megsértés
         """
+        return self.analyze_social_content_batch(
+            [content], [content_type], [media_data]
+        )[0]
+    
+    async def analyze_social_content_async(
+        self,
+        content: str,
+        content_type: ContentType,
+        media_data: Optional[bytes] = None
+    ) -> AnalysisResult:
+        """
+        Elemzés worker szálon, az event loop blokkolása nélkül
+        (pl. ha a GPU inferencia bekerül)
+        """
+        return await asyncio.to_thread(
+            self.analyze_social_content, content, content_type, media_data
+        )
+    
+    def analyze_social_content_batch(
+        self,
+        contents: List[str],
+        content_types: List[ContentType],
+        media_datas: Optional[List[Optional[bytes]]] = None
+    ) -> List[AnalysisResult]:
+        """
+        Közösségi média tartalmak kötegelt elemzése
+        A média deepfake detekció típusonként csoportosítva, egy batch hívással fut
+        """
+        
+        if media_datas is None:
+            media_datas = [None] * len(contents)
         
-        content_id = hashlib.md5(content.encode()).hexdigest()
-        flags = []
-        threat_level = ThreatLevel.SAFE
-        is_synthetic = False
-        confidence = 0.0
-        
-        # 1. Rejtett reklám detekció
-        if await self._detect_hidden_advertisement(content):
-            flags.append("REJTETT_REKLAM")
-            threat_level = ThreatLevel.SUSPICIOUS
-            print(f"[CARL] ⚠️ Rejtett reklám észlelve: {content_id[:8]}")
-        
-        # 2. Dezinformáció check
-        if await self._detect_misinformation(content):
-            flags.append("DEZINFORMACIO")
-            threat_level = ThreatLevel.HARMFUL
-            print(f"[CARL] 🚨 Dezinformáció észlelve: {content_id[:8]}")
-        
-        # 3. Deepfake jelölés (ha van média)
-        if media_data:
-            if content_type == ContentType.AUDIO:
-                is_synthetic, confidence = await self.detect_deepfake_audio(media_data)
-            elif content_type == ContentType.VIDEO:
-                is_synthetic, confidence = await self.detect_deepfake_video(media_data)
+        # BLAKE2b (16 byte): SIMD-barát, és ugyanolyan hosszú azonosító, mint az MD5
+        # UTF-8 kódolás posztonként egyszer: hash és Hyperscan ugyanazt a buffert kapja
+        encoded_contents = [content.encode("utf-8") for content in contents]
+        content_ids = [
+            hashlib.blake2b(encoded, digest_size=16).hexdigest()
+            for encoded in encoded_contents
+        ]
+        flags: List[List[str]] = [[] for _ in contents]
+        threat_levels = [ThreatLevel.SAFE] * len(contents)
+        synthetic_results = [(False, 0.0)] * len(contents)
+        
+        for i, content in enumerate(contents):
+            # 1. Rejtett reklám detekció
+            if self._detect_hidden_advertisement(content, encoded_contents[i]):
+                flags[i].append("REJTETT_REKLAM")
+                threat_levels[i] = max(threat_levels[i], ThreatLevel.SUSPICIOUS)
+                logger.info("⚠️ Rejtett reklám észlelve: %.8s", content_ids[i])
             
+            # 2. Dezinformáció check
+            if self._detect_misinformation(content):
+                flags[i].append("DEZINFORMACIO")
+                threat_levels[i] = max(threat_levels[i], ThreatLevel.HARMFUL)
+                logger.warning("🚨 Dezinformáció észlelve: %.8s", content_ids[i])
+        
+        # 3. Deepfake jelölés (ha van média), típusonként egy batch
+        groups: Dict[ContentType, Tuple[List[int], List[bytes]]] = {}
+        for i, media in enumerate(media_datas):
+            if media and content_types[i] in self._deepfake_dispatch:
+                indices, batch_media = groups.setdefault(content_types[i], ([], []))
+                indices.append(i)
+                batch_media.append(media)
+        for content_type, (indices, batch_media) in groups.items():
+            handler = self._deepfake_dispatch[content_type]
+            batch = handler(batch_media)
+            for i, result in zip(indices, batch):
+                synthetic_results[i] = result
+        
+        timestamp_ns = time.time_ns()
+        results = []
+        for i, content in enumerate(contents):
+            is_synthetic, confidence = synthetic_results[i]
             if is_synthetic:
-                flags.append("AI_GENERALT")
-                print(f"[CARL] 🤖 AI-generált tartalom: {content_id[:8]}")
-        
-        # 4. Szerzői jogi védelem
-        copyright_violation = await self._check_copyright_violation(content, media_data)
-        if copyright_violation:
-            flags.append("SZERZOI_JOG_SERTES")
-            threat_level = ThreatLevel.ILLEGAL
-            print(f"[CARL] ⚖️ Szerzői jog sértés: {content_id[:8]}")
-        
-        return AnalysisResult(
-            content_id=content_id,
-            content_type=content_type,
-            is_synthetic=is_synthetic,
-            confidence=confidence,
-            threat_level=threat_level,
-            flags=flags,
-            timestamp=datetime.now(),
-            details={
-                "analyzed_by": "CARL v" + self.version,
-                "gdpr_compliant": True
-            }
-        )
-    
-    async def _detect_hidden_advertisement(self, text: str) -> bool:
+                flags[i].append("AI_GENERALT")
+                logger.info("🤖 AI-generált tartalom: %.8s", content_ids[i])
+            
+            # 4. Szerzői jogi védelem
+            if self._check_copyright_violation(content, media_datas[i]):
+                flags[i].append("SZERZOI_JOG_SERTES")
+                threat_levels[i] = max(threat_levels[i], ThreatLevel.ILLEGAL)
+                logger.warning("⚖️ Szerzői jog sértés: %.8s", content_ids[i])
+            
+            results.append(AnalysisResult(
+                content_id=content_ids[i],
+                content_type=content_types[i],
+                is_synthetic=is_synthetic,
+                confidence=confidence,
+                threat_level=threat_levels[i],
+                flags=flags[i],
+                timestamp_ns=timestamp_ns,
+                details={
+                    "analyzed_by": "CARL v" + self.version,
+                    "gdpr_compliant": True
+                }
+            ))
+        
+        return results
+    
+    def _detect_hidden_advertisement(
+        self,
+        text: str,
+        encoded: Optional[bytes] = None
+    ) -> bool:
         """
         Rejtett reklám detekció (GVH szabályok alapján)
+        encoded: a szöveg már elkészült UTF-8 kódolása, ha a hívónál megvan
         """
         # Production: NLP model + keyword analysis
-        suspicious_patterns = [
-            "linkbio", "swipe up", "kód:", "kedvezmény",
-            "együttműködés", "szponzor nélkül"
-        ]
+        if self.use_hyperscan and _HS_DB is not None:
+            matched = []
+            _HS_DB.scan(
+                encoded if encoded is not None else text.encode("utf-8"),
+                match_event_handler=lambda *args: matched.append(True)
+            )
+            return bool(matched)
         
-        text_lower = text.lower()
-        return any(pattern in text_lower for pattern in suspicious_patterns)
+        return _SUSPICIOUS_RE.search(text) is not None
     
-    async def _detect_misinformation(self, text: str) -> bool:
+    def _detect_misinformation(self, text: str) -> bool:
         """
         Dezinformáció szűrés
         """
@@ -295,7 +629,7 @@ class CARLCognitiveEngine:
         
         return False  # Szimulált
     
-    async def _check_copyright_violation(
+    def _check_copyright_violation(
         self,
         text: str,
         media: Optional[bytes]
@@ -305,7 +639,9 @@ class CARLCognitiveEngine:
         """
         # Production: 
         # - Audio fingerprint match registry-vel
-        # - Face recognition match
+        # - Face recognition match:
+        #   D, I = self.face_index.search(probe_embedding, 1)
+        #   return D[0, 0] < 1.0  # L2 távolság küszöb
         # - Text plagiarism check
         
         return False  # Szimulált
@@ -336,7 +672,10 @@ class CARLCognitiveEngine:
         # Licensing terms check (production: database query)
         # Ellenőrzés: van-e aktív licenc szerződés?
         
-        print(f"[CARL] ✅ Engedély ellenőrizve: {content_creator_id} -> {user_id} ({usage_type})")
+        logger.info(
+            "✅ Engedély ellenőrizve: %s -> %s (%s)",
+            content_creator_id, user_id, usage_type
+        )
         
         return True, {
             "license_active": True,
@@ -363,7 +702,7 @@ class CARLCognitiveEngine:
             "face_protected": user.face_template is not None,
             "consent_status": user.consent_given,
             "content_rights": user.content_rights,
-            "report_generated": datetime.now().isoformat()
+            "report_generated": datetime.now()
         }
 
 
@@ -371,7 +710,7 @@ class CARLCognitiveEngine:
 # MAIN DEMO
 # ═══════════════════════════════════════════════════════════════
 
-async def demo():
+async def demo() -> None:
     """
     CARL motor demo - Bétatesztelés
     """
@@ -390,7 +729,7 @@ async def demo():
     print("\n📋 1. Felhasználó biometrikus regisztráció")
     print("-" * 60)
     
-    user_profile = await carl.register_user_biometrics(
+    user_profile = carl.register_user_biometrics(
         user_id="HU-12345678",
         voice_sample=b"fake_audio_data_sample",
         face_image=b"fake_image_data_sample",
@@ -406,7 +745,7 @@ async def demo():
     print("-" * 60)
     
     test_audio = b"suspicious_audio_sample"
-    is_fake, confidence = await carl.detect_deepfake_audio(test_audio, "HU-12345678")
+    is_fake, confidence = carl.detect_deepfake_audio(test_audio, "HU-12345678")
     
     print(f"Synthetic: {is_fake}")
     print(f"Confidence: {confidence*100:.1f}%")
@@ -421,13 +760,13 @@ async def demo():
     #linkbio #ad
     """
     
-    result = await carl.analyze_social_content(
+    result = carl.analyze_social_content(
         content=test_post,
         content_type=ContentType.TEXT
     )
     
     print(f"Content ID: {result.content_id[:16]}...")
-    print(f"Veszély szint: {result.threat_level.value}")
+    print(f"Veszély szint: {result.threat_level.name.lower()}")
     print(f"Flagek: {', '.join(result.flags) if result.flags else 'Nincs'}")
     
     # 4. Tartalomhasználat engedély
@@ -449,7 +788,7 @@ async def demo():
     print("-" * 60)
     
     report = carl.generate_integrity_report("HU-12345678")
-    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(report_to_json(report))
     
     print("\n" + "="*60)
     print("✅ CARL demo befejezve - Rendszer működőképes")
@@ -457,4 +796,5 @@ async def demo():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[CARL] %(message)s")
     asyncio.run(demo())
\ No newline at end of file
@@ -8,26 +8,100 @@ Funkciók:
 - Biometrikus adat védelme
 - End-to-end titkosítás
 - GDPR compliance automation
+
+Build követelmény: OpenSSL >= 1.1.1-hez linkelt Python (hashlib), így a
+SHA-256 futásidőben (CPUID) SHA-NI utasításokra dispatch-el. Ellenőrzés:
+    python -c "import ssl; print(ssl.OPENSSL_VERSION)"
 """
 
 import hashlib
 import hmac
 import secrets
 import json
-from typing import Dict, Tuple, Optional
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2
+import logging
+import time
+import struct
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional, Union
+from dataclasses import dataclass, field
+from datetime import datetime
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 import base64
 
+try:
+    import orjson  # Opcionális: gyors JSON export natív datetime támogatással
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# A GDPR és auth események naplója; kimenetet/handlert az alkalmazás állít be
+logger = logging.getLogger("carl.security")
+
 # ═══════════════════════════════════════════════════════════════
 # ZERO-KNOWLEDGE PROOF IMPLEMENTATION
 # ═══════════════════════════════════════════════════════════════
 
+# Egyszer kötött OpenSSL SHA-256 konstruktor: digestmod a HMAC-hez
+# (hmac.digest / hmac.new), illetve a hash_biometric só + adat update-jeihez
+_sha256 = hashlib.sha256
+
+
+def _from_hex(value: Union[str, bytes]) -> Optional[bytes]:
+    """Hex string -> nyers bytes; a már nyers bytes változatlan, hibás hex esetén None"""
+    if isinstance(value, bytes):
+        return value
+    try:
+        return bytes.fromhex(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _digest_equal(expected: Union[str, bytes], received: Union[str, bytes]) -> bool:
+    """
+    Konstans idejű digest összehasonlítás fix hosszú bytes alakon
+    A hex string formája (kis/nagybetű) nem befolyásolja az eredményt
+    """
+    expected_b = _from_hex(expected)
+    received_b = _from_hex(received)
+    if expected_b is None or received_b is None:
+        return False
+    return hmac.compare_digest(expected_b, received_b)
+
+
+def _to_bytes(value: Union[str, bytes]) -> bytes:
+    """str -> UTF-8 bytes; a már kódolt bytes változatlanul megy tovább"""
+    return value.encode() if isinstance(value, str) else value
+
+
+# ZKP session élettartama
+ZKP_SESSION_TTL_SECONDS = 300  # 5 perc
+# Egyszerre nyitott ZKP sessionök felső korlátja; felette a legrégebbi esik ki
+ZKP_MAX_SESSIONS = 100_000
+
+# Session véletlen pool: salt (32) | challenge (32) | session id (16)
+_SALT_SIZE = 32
+_CHALLENGE_SIZE = 32
+_SESSION_ID_SIZE = 16
+_SESSION_POOL_SIZE = _SALT_SIZE + _CHALLENGE_SIZE + _SESSION_ID_SIZE
+
+
+def _rand_pool() -> Tuple[bytes, bytes, bytes]:
+    """
+    Egyetlen CSPRNG húzás (egy getrandom syscall) session-önként, három
+    független régióra vágva; a régiók egymástól és más sessionöktől is
+    függetlenek, így a kriptográfiai tulajdonságok változatlanok
+    
+    Returns:
+        (salt, challenge_raw, session_id_raw)
+    """
+    buf = secrets.token_bytes(_SESSION_POOL_SIZE)
+    challenge_end = _SALT_SIZE + _CHALLENGE_SIZE
+    return buf[:_SALT_SIZE], buf[_SALT_SIZE:challenge_end], buf[challenge_end:]
+
+
 class ZeroKnowledgeProof:
     """
     Zero-Knowledge Proof rendszer a CARL-hoz
@@ -36,10 +110,16 @@ class ZeroKnowledgeProof:
     Példa: Bizonyítani, hogy ismered a hangod ujjlenyomatát anélkül, hogy átadnád
     """
     
-    def __init__(self):
-        self.proofs_cache = {}
+    def __init__(self, max_sessions: int = ZKP_MAX_SESSIONS):
+        # Létrehozási sorrendben: azonos TTL mellett az eleje jár le először
+        self.proofs_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.max_sessions = max_sessions
     
-    def generate_commitment(self, secret: str, salt: Optional[bytes] = None) -> Tuple[str, bytes]:
+    def generate_commitment(
+        self,
+        secret: Union[str, bytes],
+        salt: Optional[bytes] = None
+    ) -> Tuple[str, bytes]:
         """
         Elköteleződés generálása (commitment)
         
@@ -54,18 +134,24 @@ class ZeroKnowledgeProof:
         if salt is None:
             salt = secrets.token_bytes(32)
         
-        # Commitment = H(secret || salt)
-        commitment_data = secret.encode() + salt
-        commitment = hashlib.sha256(commitment_data).hexdigest()
-        
-        return commitment, salt
+        return self._commitment_digest(_to_bytes(secret), salt).hex(), salt
     
-    def verify_commitment(self, secret: str, salt: bytes, commitment: str) -> bool:
+    def _commitment_digest(self, secret_b: bytes, salt: bytes) -> bytes:
+        """Commitment = HMAC-SHA256(secret, salt), nyers 32 byte"""
+        return hmac.digest(secret_b, salt, _sha256)
+    
+    def verify_commitment(
+        self,
+        secret: Union[str, bytes],
+        salt: bytes,
+        commitment: Union[str, bytes]
+    ) -> bool:
         """
         Elköteleződés ellenőrzése
+        commitment: hex string vagy nyers digest
         """
-        expected_commitment, _ = self.generate_commitment(secret, salt)
-        return hmac.compare_digest(expected_commitment, commitment)
+        expected = self._commitment_digest(_to_bytes(secret), salt)
+        return _digest_equal(expected, commitment)
     
     def create_challenge(self) -> str:
         """
@@ -75,7 +161,7 @@ class ZeroKnowledgeProof:
     
     def generate_proof(
         self,
-        secret: str,
+        secret: Union[str, bytes],
         challenge: str,
         salt: bytes
     ) -> Dict[str, str]:
@@ -83,37 +169,49 @@ class ZeroKnowledgeProof:
         Proof generálása a challenge-re
         Zero-knowledge: a proof nem fedi fel a secret-et
         """
-        # Response = H(secret || challenge || salt)
-        proof_data = secret.encode() + challenge.encode() + salt
-        proof = hashlib.sha256(proof_data).hexdigest()
+        proof = self._proof_digest(_to_bytes(secret), bytes.fromhex(challenge), salt)
         
         return {
-            "proof": proof,
+            "proof": proof.hex(),
             "challenge": challenge,
             "timestamp": datetime.now().isoformat()
         }
     
+    def _proof_digest(self, secret_b: bytes, challenge_b: bytes, salt: bytes) -> bytes:
+        """
+        Response = HMAC-SHA256(secret, salt || challenge), nyers 32 byte
+        A challenge a token_hex mögötti 32 nyers byte, nem a 64 karakteres hex
+        """
+        return hmac.digest(secret_b, b"".join((salt, challenge_b)), _sha256)
+    
     def verify_proof(
         self,
-        commitment: str,
-        challenge: str,
+        commitment: Union[str, bytes],
+        challenge: Union[str, bytes],
         proof: str,
-        secret: str,
+        secret: Union[str, bytes],
         salt: bytes
     ) -> bool:
         """
         Proof ellenőrzése
         Ellenőrzi, hogy a prover valóban ismeri a secret-et anélkül, hogy megkapná
+        commitment / challenge: hex string vagy a session-ben tárolt nyers bytes
         """
+        # Egyszeri kódolás a commitment és a proof újraszámolásához
+        secret_b = _to_bytes(secret)
+        challenge_b = _from_hex(challenge)
+        if challenge_b is None:
+            return False
+        
         # 1. Ellenőrizzük a commitment-et
-        if not self.verify_commitment(secret, salt, commitment):
+        if not self.verify_commitment(secret_b, salt, commitment):
             return False
         
-        # 2. Újrageneráljuk a proof-ot
-        expected_proof = self.generate_proof(secret, challenge, salt)
+        # 2. Újraszámoljuk a proof-ot (nyers digest, hex csak az API határon)
+        expected_proof = self._proof_digest(secret_b, challenge_b, salt)
         
         # 3. Összehasonlítjuk
-        return hmac.compare_digest(expected_proof["proof"], proof)
+        return _digest_equal(expected_proof, proof)
     
     def create_biometric_zkp_session(self, user_id: str, biometric_hash: str) -> Dict:
         """
@@ -122,30 +220,65 @@ class ZeroKnowledgeProof:
         Használat: Felhasználó bizonyítja, hogy ismeri a biometrikus adatát
         anélkül, hogy elküldené a szervernek
         """
-        # 1. Commitment generálás
-        commitment, salt = self.generate_commitment(biometric_hash)
+        # Salt, challenge és session id egy véletlen húzásból
+        salt, challenge_raw, session_id_raw = _rand_pool()
+        
+        # 1. Commitment generálás: HMAC(secret, salt); a kulcsolt kontextus
+        # (belső/külső pad + salt) megmarad, a proof-hoz csak a challenge kell
+        proof_ctx = hmac.new(_to_bytes(biometric_hash), salt, _sha256)
+        commitment = proof_ctx.copy().hexdigest()
         
-        # 2. Challenge generálás
-        challenge = self.create_challenge()
+        # 2. Challenge generálás (hex az API kompatibilitásért)
+        challenge = challenge_raw.hex()
         
         # Session tárolása
-        session_id = secrets.token_hex(16)
+        session_id = session_id_raw.hex()
+        now_ns = time.monotonic_ns()
         self.proofs_cache[session_id] = {
             "user_id": user_id,
             "commitment": commitment,
             "salt": salt,
             "challenge": challenge,
-            "created_at": datetime.now(),
-            "expires_at": datetime.now() + timedelta(minutes=5)
+            # Nyers alakok: a verify nem dekódol hex-et minden hívásnál
+            "commitment_bytes": bytes.fromhex(commitment),
+            "challenge_bytes": challenge_raw,
+            "proof_ctx": proof_ctx,
+            # Monoton int időbélyegek: gyors, allokációmentes lejárat ellenőrzés
+            "created_at_ns": now_ns,
+            "expires_at_ns": now_ns + ZKP_SESSION_TTL_SECONDS * 1_000_000_000
         }
         
+        # Soha nem ellenőrzött sessionök ne halmozódjanak
+        self.sweep_expired(now_ns)
+        while len(self.proofs_cache) > self.max_sessions:
+            self.proofs_cache.popitem(last=False)
+        
         return {
             "session_id": session_id,
             "commitment": commitment,
             "challenge": challenge,
-            "expires_in": 300  # 5 perc
+            "expires_in": ZKP_SESSION_TTL_SECONDS
         }
     
+    def sweep_expired(self, now_ns: Optional[int] = None) -> int:
+        """
+        Lejárt sessionök törlése a cache elejéről
+        
+        Returns:
+            Törölt sessionök száma
+        """
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        
+        removed = 0
+        while self.proofs_cache:
+            oldest = next(iter(self.proofs_cache.values()))
+            if oldest["expires_at_ns"] >= now_ns:
+                break
+            self.proofs_cache.popitem(last=False)
+            removed += 1
+        return removed
+    
     def verify_biometric_zkp(
         self,
         session_id: str,
@@ -160,18 +293,17 @@ class ZeroKnowledgeProof:
             return False
         
         # Lejárt?
-        if datetime.now() > session["expires_at"]:
+        if time.monotonic_ns() > session["expires_at_ns"]:
             del self.proofs_cache[session_id]
             return False
         
-        # Proof ellenőrzése
-        is_valid = self.verify_proof(
-            commitment=session["commitment"],
-            challenge=session["challenge"],
-            proof=proof,
-            secret=biometric_hash,
-            salt=session["salt"]
-        )
+        # Proof ellenőrzése: a commitment köti a secret-et a session-höz,
+        # így a tárolt HMAC kontextus ugyanarra a secret-re vonatkozik
+        is_valid = False
+        if self.verify_commitment(biometric_hash, session["salt"], session["commitment_bytes"]):
+            proof_mac = session["proof_ctx"].copy()
+            proof_mac.update(session["challenge_bytes"])
+            is_valid = _digest_equal(proof_mac.digest(), proof)
         
         # Session törlése használat után
         if is_valid:
@@ -184,6 +316,9 @@ class ZeroKnowledgeProof:
 # AES-256 ENCRYPTION
 # ═══════════════════════════════════════════════════════════════
 
+GCM_IV_SIZE = 12   # byte
+GCM_TAG_SIZE = 16  # byte
+
 class AES256Encryption:
     """
     AES-256-GCM titkosítás CARL adatokhoz
@@ -196,84 +331,118 @@ class AES256Encryption:
         else:
             self.master_key = master_key
     
+    @property
+    def master_key(self) -> bytes:
+        return self._master_key
+    
+    @master_key.setter
+    def master_key(self, key: bytes):
+        # Az AEAD objektum (AES kulcs ütemezés) kulcsonként egyszer készül el,
+        # hívásonként csak az IV változik
+        self._master_key = key
+        self._aead = AESGCM(key)
+    
     def derive_key(self, password: str, salt: bytes) -> bytes:
         """
-        Jelszóból származtatott kulcs (PBKDF2)
+        Jelszóból származtatott kulcs (scrypt)
+        Memória-kemény KDF: a támadó költsége a védekező CPU idejéhez képest
+        nagyobb, mint a soros PBKDF2-HMAC-SHA256 láncnál
         """
-        kdf = PBKDF2(
-            algorithm=hashes.SHA256(),
-            length=32,
+        kdf = Scrypt(
             salt=salt,
-            iterations=100000,
-            backend=default_backend()
+            length=32,
+            n=2**15,
+            r=8,
+            p=1
         )
         return kdf.derive(password.encode())
     
-    def encrypt(self, plaintext: bytes, associated_data: Optional[bytes] = None) -> Dict:
+    def encrypt_bytes(self, plaintext: bytes, associated_data: Optional[bytes] = None) -> bytes:
         """
-        Adat titkosítása AES-256-GCM-mel
+        Adat titkosítása AES-256-GCM-mel, egyetlen AEAD hívással
         
         Returns:
-            Dict with: ciphertext, iv, tag, associated_data
+            iv (12 byte) || ciphertext || tag (16 byte), belső tároláshoz
         """
         # IV generálás (12 byte GCM-hez)
-        iv = secrets.token_bytes(12)
-        
-        # Encryptor létrehozása
-        cipher = Cipher(
-            algorithms.AES(self.master_key),
-            modes.GCM(iv),
-            backend=default_backend()
+        iv = secrets.token_bytes(GCM_IV_SIZE)
+        return iv + self._aead.encrypt(iv, plaintext, associated_data)
+    
+    def decrypt_bytes(self, blob: bytes, associated_data: Optional[bytes] = None) -> bytes:
+        """
+        iv || ciphertext || tag blob visszafejtése (integritás ellenőrzéssel)
+        """
+        return self._aead.decrypt(
+            blob[:GCM_IV_SIZE], blob[GCM_IV_SIZE:], associated_data
         )
-        encryptor = cipher.encryptor()
-        
-        # Associated data (authentication)
-        if associated_data:
-            encryptor.authenticate_additional_data(associated_data)
+    
+    def encrypt(self, plaintext: bytes, associated_data: Optional[bytes] = None) -> Dict:
+        """
+        Adat titkosítása AES-256-GCM-mel
         
-        # Titkosítás
-        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+        Returns:
+            Dict with: ciphertext, iv, tag, associated_data (nyers bytes;
+            JSON/hálózat felé a to_wire() alakít base64-re)
+        """
+        blob = self.encrypt_bytes(plaintext, associated_data)
         
         return {
-            "ciphertext": base64.b64encode(ciphertext).decode(),
-            "iv": base64.b64encode(iv).decode(),
-            "tag": base64.b64encode(encryptor.tag).decode(),
-            "associated_data": base64.b64encode(associated_data).decode() if associated_data else None
+            "ciphertext": blob[GCM_IV_SIZE:-GCM_TAG_SIZE],
+            "iv": blob[:GCM_IV_SIZE],
+            "tag": blob[-GCM_TAG_SIZE:],
+            "associated_data": associated_data
         }
     
     def decrypt(self, encrypted_data: Dict) -> bytes:
         """
-        Adat visszafejtése
+        Adat visszafejtése (nyers bytes mezők; wire formátumnál előbb from_wire())
         """
-        ciphertext = base64.b64decode(encrypted_data["ciphertext"])
-        iv = base64.b64decode(encrypted_data["iv"])
-        tag = base64.b64decode(encrypted_data["tag"])
-        
-        associated_data = None
-        if encrypted_data.get("associated_data"):
-            associated_data = base64.b64decode(encrypted_data["associated_data"])
-        
-        # Decryptor létrehozása
-        cipher = Cipher(
-            algorithms.AES(self.master_key),
-            modes.GCM(iv, tag),
-            backend=default_backend()
+        return self.decrypt_bytes(
+            encrypted_data["iv"] + encrypted_data["ciphertext"] + encrypted_data["tag"],
+            encrypted_data.get("associated_data")
         )
-        decryptor = cipher.decryptor()
-        
-        # Associated data ellenőrzése
-        if associated_data:
-            decryptor.authenticate_additional_data(associated_data)
-        
-        # Visszafejtés
-        plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        return plaintext
+
+
+_WIRE_FIELDS = ("ciphertext", "iv", "tag", "associated_data")
+
+def to_wire(encrypted_data: Dict) -> Dict:
+    """
+    Titkosított dict bytes mezőinek base64 kódolása JSON/hálózati határon
+    """
+    wire = dict(encrypted_data)
+    for field in _WIRE_FIELDS:
+        if wire.get(field) is not None:
+            wire[field] = base64.b64encode(wire[field]).decode()
+    return wire
+
+def from_wire(wire_data: Dict) -> Dict:
+    """
+    to_wire() inverze: base64 mezők vissza nyers bytes-ra
+    """
+    encrypted_data = dict(wire_data)
+    for field in _WIRE_FIELDS:
+        if encrypted_data.get(field) is not None:
+            encrypted_data[field] = base64.b64decode(encrypted_data[field])
+    return encrypted_data
 
 
 # ═══════════════════════════════════════════════════════════════
 # BIOMETRIC DATA PROTECTION
 # ═══════════════════════════════════════════════════════════════
 
+# Biometrikus template fix bináris layout: version | SHA-256 hash | salt | created_at (ns)
+TEMPLATE_VERSION = 1
+TEMPLATE_FMT = struct.Struct(">B32s32sQ")
+
+# Hang + arc template egy titkosított csomagban: a két fix méretű template egymás után
+TEMPLATE_BUNDLE_VERSION = 3
+TEMPLATE_BUNDLE_AAD = b"CARL_BIOMETRIC_TEMPLATE_V3"
+
+# Template-enként ennyi bájt felett éri meg a hashelést külön szálakon futtatni
+# (regisztráció, kötegelt hashelés): a pool indítása ~150 µs, elemenként ~20 µs
+# overhead, egy 1 MiB-os SHA-256 ~1.7 ms
+_PARALLEL_TEMPLATE_MIN_SIZE = 1024 * 1024
+
 class BiometricProtection:
     """
     Biometrikus adatok védelme
@@ -290,60 +459,122 @@ class BiometricProtection:
         if salt is None:
             salt = secrets.token_bytes(32)
         
-        # SHA-256 + salt
-        hash_obj = hashlib.sha256()
-        hash_obj.update(salt + biometric_data)
+        # SHA-256 + salt, külön update: nincs input hosszal arányos összefűzés
+        hash_obj = _sha256()
+        hash_obj.update(salt)
+        hash_obj.update(biometric_data)
         bio_hash = hash_obj.hexdigest()
         
         return bio_hash, salt
     
-    def create_template(self, biometric_data: bytes) -> Dict:
+    def hash_biometric_batch(
+        self,
+        items: List[Tuple[bytes, Optional[bytes]]],
+        max_workers: Optional[int] = None
+    ) -> List[Tuple[str, bytes]]:
+        """
+        Biometrikus adatok kötegelt hashelése (tömeges regisztráció, újraindexelés)
+        
+        Args:
+            items: (biometric_data, salt) párok; salt None esetén új só készül
+        
+        Returns:
+            (hash, salt) párok a bemenet sorrendjében
+        """
+        # MiB alatti inputoknál a szálkészlet többe kerül, mint amennyit nyer
+        if sum(len(data) >= _PARALLEL_TEMPLATE_MIN_SIZE for data, _ in items) < 2:
+            return [self.hash_biometric(data, salt) for data, salt in items]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda item: self.hash_biometric(*item), items))
+    
+    def create_template(self, biometric_data: bytes) -> bytes:
         """
         Biometrikus template létrehozása
         Template = hash + metadata, soha nem a raw adat
+        
+        Returns:
+            TEMPLATE_FMT szerint csomagolt 73 byte (olvasható alak: template_to_dict)
         """
         bio_hash, salt = self.hash_biometric(biometric_data)
         
-        template = {
-            "hash": bio_hash,
-            "salt": base64.b64encode(salt).decode(),
-            "algorithm": "SHA256",
-            "created_at": datetime.now().isoformat(),
-            "version": "1.0"
-        }
-        
-        return template
+        return TEMPLATE_FMT.pack(
+            TEMPLATE_VERSION, bytes.fromhex(bio_hash), salt, time.time_ns()
+        )
     
     def verify_biometric(
         self,
         input_data: bytes,
-        stored_template: Dict
+        stored_template: bytes
     ) -> bool:
         """
         Biometrikus adat ellenőrzése
         """
-        salt = base64.b64decode(stored_template["salt"])
+        _, stored_hash, salt, _ = TEMPLATE_FMT.unpack(stored_template)
         input_hash, _ = self.hash_biometric(input_data, salt)
         
-        return hmac.compare_digest(input_hash, stored_template["hash"])
+        return _digest_equal(input_hash, stored_hash)
     
-    def encrypt_biometric_template(self, template: Dict) -> Dict:
+    def encrypt_biometric_template(self, template: bytes) -> Dict:
         """
         Template titkosítása tároláshoz (extra védelem)
         """
-        template_json = json.dumps(template).encode()
         encrypted = self.encryptor.encrypt(
-            template_json,
+            template,
             associated_data=b"CARL_BIOMETRIC_TEMPLATE"
         )
         return encrypted
     
-    def decrypt_biometric_template(self, encrypted_template: Dict) -> Dict:
+    def decrypt_biometric_template(self, encrypted_template: Dict) -> bytes:
         """
         Template visszafejtése
         """
-        decrypted = self.encryptor.decrypt(encrypted_template)
-        return json.loads(decrypted.decode())
+        return self.encryptor.decrypt(encrypted_template)
+    
+    def encrypt_biometric_template_pair(self, voice_template: bytes, face_template: bytes) -> Dict:
+        """
+        Hang és arc template titkosítása egyetlen AEAD hívással
+        Egy IV és egy GCM setup a kettő helyett
+        
+        A csomag keret nélküli: mindkét template pontosan TEMPLATE_FMT.size byte
+        """
+        if len(voice_template) != TEMPLATE_FMT.size or len(face_template) != TEMPLATE_FMT.size:
+            raise ValueError(f"Biometric templates must be {TEMPLATE_FMT.size} bytes each")
+        
+        encrypted = self.encryptor.encrypt(
+            voice_template + face_template, associated_data=TEMPLATE_BUNDLE_AAD
+        )
+        encrypted["version"] = TEMPLATE_BUNDLE_VERSION
+        return encrypted
+    
+    def decrypt_biometric_template_pair(self, encrypted_bundle: Dict) -> Tuple[bytes, bytes]:
+        """
+        Template csomag visszafejtése
+        
+        Returns:
+            (voice_template, face_template)
+        """
+        if encrypted_bundle.get("version") != TEMPLATE_BUNDLE_VERSION:
+            raise ValueError("Unsupported biometric template bundle version")
+        
+        payload = self.encryptor.decrypt(encrypted_bundle)
+        if len(payload) != 2 * TEMPLATE_FMT.size:
+            raise ValueError("Malformed biometric template bundle")
+        return payload[:TEMPLATE_FMT.size], payload[TEMPLATE_FMT.size:]
+
+
+def template_to_dict(template: bytes) -> Dict:
+    """
+    Bináris template olvasható alakja (GDPR export, diagnosztika)
+    """
+    version, bio_hash, salt, created_ns = TEMPLATE_FMT.unpack(template)
+    return {
+        "hash": bio_hash.hex(),
+        "salt": base64.b64encode(salt).decode(),
+        "algorithm": "SHA256",
+        "created_at": datetime.fromtimestamp(created_ns / 1e9).isoformat(),
+        "version": version
+    }
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -359,6 +590,11 @@ class GDPRConsent:
     timestamp: datetime
     ip_address: Optional[str] = None
     consent_text: Optional[str] = None
+    # ISO alak egyszer, rögzítéskor: az export nem formáz soronként
+    timestamp_iso: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.timestamp_iso = self.timestamp.isoformat()
 
 @dataclass
 class DataAccessLog:
@@ -370,6 +606,11 @@ class DataAccessLog:
     timestamp: datetime
     purpose: str
     legal_basis: str
+    # ISO alak egyszer, rögzítéskor: az export nem formáz soronként
+    timestamp_iso: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.timestamp_iso = self.timestamp.isoformat()
 
 class GDPRCompliance:
     """
@@ -385,6 +626,10 @@ class GDPRCompliance:
     def __init__(self):
         self.consents = {}
         self.access_logs = []
+        # user_id -> a felhasználó log bejegyzései (export/törlés O(user_logs))
+        self._logs_by_user: Dict[str, List[DataAccessLog]] = defaultdict(list)
+        # (user_id, purpose) -> legutóbbi döntés, O(1) consent ellenőrzéshez
+        self._latest_consent: Dict[Tuple[str, str], bool] = {}
     
     def record_consent(
         self,
@@ -409,23 +654,16 @@ class GDPRCompliance:
             self.consents[user_id] = []
         
         self.consents[user_id].append(consent)
+        self._latest_consent[(user_id, purpose)] = consent_given
         
-        print(f"[GDPR] Consent recorded: {user_id} - {purpose} - {consent_given}")
+        logger.info("[GDPR] Consent recorded: %s - %s - %s", user_id, purpose, consent_given)
         return consent
     
     def check_consent(self, user_id: str, purpose: str) -> bool:
         """
         Hozzájárulás ellenőrzése
         """
-        if user_id not in self.consents:
-            return False
-        
-        user_consents = self.consents[user_id]
-        for consent in reversed(user_consents):  # Legutóbbi először
-            if consent.purpose == purpose:
-                return consent.consent_given
-        
-        return False
+        return self._latest_consent.get((user_id, purpose), False)
     
     def log_data_access(
         self,
@@ -450,19 +688,39 @@ class GDPRCompliance:
         )
         
         self.access_logs.append(log)
+        self._logs_by_user[user_id].append(log)
         
-        print(f"[GDPR] Access logged: {accessed_by} accessed {data_category} of {user_id}")
+        logger.info("[GDPR] Access logged: %s accessed %s of %s", accessed_by, data_category, user_id)
         return log
     
     def get_user_data_export(self, user_id: str) -> Dict:
         """
         Felhasználói adatok exportálása (Article 20 - Data Portability)
         """
+        return self._export_record(user_id)
+    
+    def get_user_data_export_bytes(self, user_id: str) -> bytes:
+        """
+        Felhasználói adatok exportja közvetlenül JSON-ként (UTF-8)
+        orjson ha elérhető, különben a standard json
+        """
+        record = self._export_record(user_id)
+        if orjson is not None:
+            return orjson.dumps(record, option=orjson.OPT_INDENT_2)
+        return json.dumps(record, indent=2, ensure_ascii=False).encode()
+    
+    def _export_record(self, user_id: str) -> Dict:
+        """
+        Export adatszerkezet a rögzítéskor előállított ISO időbélyegekkel
+        """
+        # Egy export = egy időpont
+        export_ts = datetime.now().isoformat()
+        
         consents = [
             {
                 "purpose": c.purpose,
                 "consent_given": c.consent_given,
-                "timestamp": c.timestamp.isoformat()
+                "timestamp": c.timestamp_iso
             }
             for c in self.consents.get(user_id, [])
         ]
@@ -472,14 +730,14 @@ class GDPRCompliance:
                 "accessed_by": log.accessed_by,
                 "access_type": log.access_type,
                 "data_category": log.data_category,
-                "timestamp": log.timestamp.isoformat()
+                "timestamp": log.timestamp_iso
             }
-            for log in self.access_logs if log.user_id == user_id
+            for log in self._logs_by_user.get(user_id, ())
         ]
         
         return {
             "user_id": user_id,
-            "export_date": datetime.now().isoformat(),
+            "export_date": export_ts,
             "consents": consents,
             "access_logs": access_logs,
             "gdpr_notice": "Ez az Ön személyes adatainak exportja a GDPR Article 20 alapján"
@@ -491,14 +749,17 @@ class GDPRCompliance:
         """
         # Consent-ek törlése
         if user_id in self.consents:
+            for consent in self.consents[user_id]:
+                self._latest_consent.pop((user_id, consent.purpose), None)
             del self.consents[user_id]
         
         # Access log-ok anonimizálása (nem törölhetők, de anonimizálandók)
-        for log in self.access_logs:
-            if log.user_id == user_id:
-                log.user_id = "DELETED_USER"
+        user_logs = self._logs_by_user.pop(user_id, [])
+        for log in user_logs:
+            log.user_id = "DELETED_USER"
+        self._logs_by_user["DELETED_USER"].extend(user_logs)
         
-        print(f"[GDPR] User data erased: {user_id} - Reason: {reason}")
+        logger.info("[GDPR] User data erased: %s - Reason: %s", user_id, reason)
         
         return {
             "user_id": user_id,
@@ -524,11 +785,11 @@ class CarlSecurityManager:
         self.biometric = BiometricProtection()
         self.gdpr = GDPRCompliance()
         
-        print("[CARL Security] ✅ Security Manager initialized")
-        print("  - Zero-Knowledge Proof: Active")
-        print("  - AES-256 Encryption: Active")
-        print("  - Biometric Protection: Active")
-        print("  - GDPR Compliance: Active")
+        logger.info("[CARL Security] ✅ Security Manager initialized")
+        logger.info("  - Zero-Knowledge Proof: Active")
+        logger.info("  - AES-256 Encryption: Active")
+        logger.info("  - Biometric Protection: Active")
+        logger.info("  - GDPR Compliance: Active")
     
     def secure_user_registration(
         self,
@@ -550,33 +811,50 @@ class CarlSecurityManager:
             consent_given=True
         )
         
-        # Biometrikus template-ek létrehozása
-        voice_template = self.biometric.create_template(voice_data)
-        face_template = self.biometric.create_template(face_data)
+        # Biometrikus template-ek létrehozása; csak MiB-os inputnál fut a két
+        # hashelés párhuzamosan, kisebbnél a pool indítása többe kerül
+        if min(len(voice_data), len(face_data)) >= _PARALLEL_TEMPLATE_MIN_SIZE:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                voice_future = executor.submit(self._process_template, voice_data)
+                face_future = executor.submit(self._process_template, face_data)
+                voice_template, face_template = voice_future.result(), face_future.result()
+        else:
+            voice_template = self._process_template(voice_data)
+            face_template = self._process_template(face_data)
         
-        # Template-ek titkosítása
-        encrypted_voice = self.biometric.encrypt_biometric_template(voice_template)
-        encrypted_face = self.biometric.encrypt_biometric_template(face_template)
+        # Template-ek titkosítása egy csomagban
+        encrypted_templates = self.biometric.encrypt_biometric_template_pair(
+            voice_template, face_template
+        )
         
-        print(f"[CARL Security] User registered securely: {user_id}")
+        logger.info("[CARL Security] User registered securely: %s", user_id)
         
         return {
             "user_id": user_id,
-            "voice_template": encrypted_voice,
-            "face_template": encrypted_face,
+            "biometric_templates": encrypted_templates,
             "gdpr_compliant": True,
             "encryption": "AES-256-GCM",
             "registered_at": datetime.now().isoformat()
         }
     
+    def _process_template(self, biometric_data: bytes) -> bytes:
+        """
+        Egy modalitás template pipeline-ja (hash + csomagolás)
+        """
+        return self.biometric.create_template(biometric_data)
+    
     def secure_biometric_login(
         self,
         user_id: str,
         input_biometric: bytes,
-        stored_encrypted_template: Dict
+        stored_encrypted_template: Dict,
+        modality: str = "voice"
     ) -> bool:
         """
         Biztonságos biometrikus bejelentkezés ZKP-vel
+        
+        stored_encrypted_template: egyedi template, vagy a regisztrációkor
+        készült hang + arc csomag (ekkor a modality választ)
         """
         # GDPR access log
         self.gdpr.log_data_access(
@@ -589,14 +867,23 @@ class CarlSecurityManager:
         )
         
         # Template visszafejtése
-        stored_template = self.biometric.decrypt_biometric_template(
-            stored_encrypted_template
-        )
+        if stored_encrypted_template.get("version") == TEMPLATE_BUNDLE_VERSION:
+            voice_template, face_template = self.biometric.decrypt_biometric_template_pair(
+                stored_encrypted_template
+            )
+            stored_template = voice_template if modality == "voice" else face_template
+        else:
+            stored_template = self.biometric.decrypt_biometric_template(
+                stored_encrypted_template
+            )
         
         # Biometrikus ellenőrzés
         is_valid = self.biometric.verify_biometric(input_biometric, stored_template)
         
-        print(f"[CARL Security] Login attempt: {user_id} - {'✅ Success' if is_valid else '❌ Failed'}")
+        logger.info(
+            "[CARL Security] Login attempt: %s - %s",
+            user_id, "✅ Success" if is_valid else "❌ Failed"
+        )
         
         return is_valid
 
@@ -663,7 +950,8 @@ def demo():
     login_success = security.secure_biometric_login(
         user_id="HU-12345678",
         input_biometric=b"simulated_voice_biometric_data",
-        stored_encrypted_template=user_data['voice_template']
+        stored_encrypted_template=user_data['biometric_templates'],
+        modality="voice"
     )
     
     print(f"Login result: {'✅ Success' if login_success else '❌ Failed'}")
@@ -672,8 +960,8 @@ def demo():
     print("\n📊 4. GDPR DATA EXPORT (Article 20)")
     print("-" * 70)
     
-    user_export = security.gdpr.get_user_data_export("HU-12345678")
-    print(json.dumps(user_export, indent=2, ensure_ascii=False))
+    user_export = security.gdpr.get_user_data_export_bytes("HU-12345678")
+    print(user_export.decode())
     
     # 5. Right to erasure
     print("\n🗑️  5. GDPR RIGHT TO ERASURE (Article 17)")
@@ -691,4 +979,5 @@ def demo():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     demo()
\ No newline at end of file